@@ -0,0 +1,433 @@
+#!/usr/bin/env python
+"""
+Streams ISBNs from a file (or stdin) and looks each one up on isbndb.com,
+writing one record per ISBN as NDJSON or CSV as soon as it is fetched.
+
+Progress is checkpointed to a file of completed ISBNs so that an interrupted
+run may be restarted with the same arguments without spending key quota on
+ISBNs that were already looked up. ISBNs the server rejected as bad or unknown
+(400, 404, 410) are checkpointed too and only retried with --retry-errors.
+Throttling, timeouts and server errors are retried, and a rejected access key
+(401, 403) stops the run.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import shelve
+import socket
+import argparse
+import threading
+
+from Queue import Queue, Empty
+from isbndb import ISBNdbException
+from isbndb import ISBNdbHttpException
+from isbndb.client import ISBNdbClient
+from isbndb.throttle import RateLimiter, AdaptiveLimiter
+
+FIELDS = ('isbn', 'status', 'book_id', 'isbn10', 'isbn13', 'title', 'title_long',
+          'authors_text', 'publisher_id', 'publisher_text', 'summary', 'http_status',
+          'error')
+
+DONE = object()
+
+# HTTP statuses that reject a single ISBN, that are worth retrying after a
+# backoff, and that mean the access key itself was refused
+PERMANENT = frozenset((400, 404, 410))
+TRANSIENT = frozenset((408, 429))
+FATAL     = frozenset((401, 403))
+
+def read_isbns(stream):
+    """
+    Yields normalized ISBNs from a stream, one per line. Blank lines and lines
+    beginning with a '#' are skipped, hyphens and spaces are removed.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        yield line.replace('-', '').replace(' ', '').upper()
+
+def book_record(isbn, book):
+    """
+    Flattens a Book model into a record dictionary for output.
+    """
+    return {
+        'isbn':           isbn,
+        'status':         'ok',
+        'book_id':        book.book_id,
+        'isbn10':         book.isbn,
+        'isbn13':         book.isbn13,
+        'title':          book.title,
+        'title_long':     book.title_long,
+        'authors_text':   book.authors_text,
+        'publisher_id':   book.publisher_id,
+        'publisher_text': book.publisher_text,
+        'summary':        book.summary,
+    }
+
+def is_permanent(record):
+    """
+    True if the record is an error that retrying will not fix, i.e. the
+    server rejected the ISBN itself.
+    """
+    return record['status'] == 'error' and record.get('http_status') in PERMANENT
+
+def is_fatal(record):
+    """
+    True if the record is an error that every further lookup would hit too,
+    i.e. the server refused the access key.
+    """
+    return record['status'] == 'error' and record.get('http_status') in FATAL
+
+def is_retryable(status):
+    """
+    True for network errors (no status), throttling, timeouts and server errors.
+    """
+    return status is None or status >= 500 or status in TRANSIENT
+
+class Checkpoint(object):
+    """
+    An append only log of the ISBNs that have been looked up, either
+    successfully or with a permanent error (logged as "ISBN<tab>failed").
+    """
+
+    def __init__(self, path):
+        self.path   = path
+        self.done   = set()
+        self.failed = set()
+        if os.path.exists(path):
+            with open(path) as fobj:
+                for line in fobj:
+                    fields = line.split()
+                    if not fields:
+                        continue
+                    self.done.add(fields[0])
+                    if fields[1:] == ['failed']:
+                        self.failed.add(fields[0])
+                    else:
+                        self.failed.discard(fields[0])
+        self.fobj = open(path, 'a')
+
+    def __contains__(self, isbn):
+        return isbn in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def add(self, isbn, failed=False):
+        self.done.add(isbn)
+        if failed:
+            self.failed.add(isbn)
+            self.fobj.write(isbn + '\tfailed\n')
+        else:
+            self.failed.discard(isbn)
+            self.fobj.write(isbn + '\n')
+
+    def flush(self):
+        self.fobj.flush()
+
+    def close(self):
+        self.fobj.close()
+
+class Writer(object):
+    """
+    Writes records to an output stream as NDJSON or CSV, flushing regularly
+    so that partial output survives an interrupted run.
+    """
+
+    def __init__(self, stream, format='ndjson', header=True):
+        self.stream = stream
+        self.format = format
+        if format == 'csv':
+            self.csv = csv.DictWriter(stream, FIELDS, extrasaction='ignore')
+            if header:
+                self.csv.writeheader( )
+        elif format != 'ndjson':
+            raise ISBNdbException("%s is not a recognized output format." % format)
+
+    def write(self, record):
+        if self.format == 'csv':
+            row = dict((key, val.encode('utf-8') if isinstance(val, unicode) else val)
+                       for key, val in record.items())
+            self.csv.writerow(row)
+        else:
+            self.stream.write(json.dumps(record) + '\n')
+
+    def flush(self):
+        self.stream.flush()
+
+class Progress(object):
+    """
+    Tracks the number of lookups made and reports throughput and error rate.
+    """
+
+    def __init__(self, stream=sys.stderr, interval=5.0, skipped=0, limiter=None):
+        self.stream   = stream
+        self.limiter  = limiter
+        self.interval = interval
+        self.started  = time.time()
+        self.reported = self.started
+        self.skipped  = skipped
+        self.counts   = {'ok': 0, 'missing': 0, 'error': 0}
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def update(self, status):
+        self.counts[status] += 1
+        if self.interval and time.time() - self.reported >= self.interval:
+            self.report( )
+
+    def report(self):
+        self.reported = time.time()
+        elapsed = self.reported - self.started
+        total   = self.total
+        rate    = total / elapsed if elapsed else 0.0
+        errors  = 100.0 * self.counts['error'] / total if total else 0.0
+        self.stream.write("%d looked up (%d ok, %d missing, %d errors, %d skipped) "
+                          "%0.1f/sec, %0.1f%% errors" % (total, self.counts['ok'],
+                          self.counts['missing'], self.counts['error'], self.skipped,
+                          rate, errors))
+        if self.limiter is not None and self.limiter.rtt is not None:
+            self.stream.write(", concurrency %d, rtt %dms" % (self.limiter.limit,
+                              self.limiter.rtt * 1000))
+        self.stream.write("\n")
+        self.stream.flush()
+
+class BulkLookup(object):
+    """
+    Looks up ISBNs on a pool of worker threads that share a client, a rate
+    limiter and (optionally) a persistent cache of previous results.
+    """
+
+    def __init__(self, client, workers=4, rate=None, cache=None,
+                 results='details', retries=2):
+        self.client  = client
+        self.workers = workers
+        self.limiter = RateLimiter(rate) if rate else None
+        self.cache   = cache
+        self.results = results
+        self.retries = retries
+        self.lock    = threading.Lock()
+
+    def lookup(self, isbn):
+        """
+        Returns the record for a single ISBN, from the cache if possible.
+        Network errors, throttling, timeouts and server errors are retried
+        with a backoff.
+        """
+        # Records depend on the results set requested as well as the ISBN
+        key = '%s:%s' % (self.results, isbn)
+        if self.cache is not None:
+            with self.lock:
+                if key in self.cache:
+                    return self.cache[key]
+
+        for attempt in xrange(self.retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire( )
+            try:
+                books = self.client.books.isbn(isbn, results=self.results)
+                break
+            except (ISBNdbHttpException, socket.error), e:
+                status = getattr(e, 'status', None)
+                if attempt == self.retries or not is_retryable(status):
+                    raise
+                time.sleep(2 ** attempt)
+
+        if len(books) > 0:
+            record = book_record(isbn, books[0])
+        else:
+            record = {'isbn': isbn, 'status': 'missing'}
+
+        if self.cache is not None:
+            with self.lock:
+                self.cache[key] = record
+        return record
+
+    def work(self, jobs, results, stopped):
+        while True:
+            isbn = jobs.get( )
+            if isbn is DONE:
+                results.put(DONE)
+                return
+            if stopped.is_set():
+                continue
+            try:
+                results.put(self.lookup(isbn))
+            except Exception, e:
+                results.put({'isbn': isbn, 'status': 'error', 'error': str(e),
+                             'http_status': getattr(e, 'status', None)})
+
+    def feed(self, isbns, jobs, failures, stopped):
+        """
+        Queues the ISBNs for the workers. An error reading the input is handed
+        back to run, and the workers are always told to stop.
+        """
+        try:
+            for isbn in isbns:
+                if stopped.is_set():
+                    break
+                jobs.put(isbn)
+        except Exception:
+            failures.append(sys.exc_info())
+        finally:
+            for i in xrange(self.workers):
+                jobs.put(DONE)
+
+    def run(self, isbns):
+        """
+        Yields a record for each ISBN as it completes (not in input order).
+        Errors raised while reading the ISBNs are re-raised once the ISBNs
+        read before the error have been looked up. If the caller stops early
+        (closing the generator), queued ISBNs are skipped and the lookups in
+        progress are waited for.
+        """
+        jobs     = Queue(self.workers * 4)
+        results  = Queue(self.workers * 4)
+        failures = []
+        stopped  = threading.Event()
+
+        threads = [threading.Thread(target=self.feed, args=(isbns, jobs, failures, stopped))]
+        threads.extend(threading.Thread(target=self.work, args=(jobs, results, stopped))
+                       for i in xrange(self.workers))
+        for thread in threads:
+            thread.daemon = True
+            thread.start( )
+
+        running = self.workers
+        try:
+            while running:
+                try:
+                    # Time out so that a KeyboardInterrupt is delivered promptly
+                    record = results.get(timeout=0.5)
+                except Empty:
+                    continue
+                if record is DONE:
+                    running -= 1
+                else:
+                    yield record
+        finally:
+            stopped.set( )
+            while running:
+                try:
+                    if results.get(timeout=0.5) is DONE:
+                        running -= 1
+                except Empty:
+                    continue
+
+        if failures:
+            exc_type, exc_value, exc_tb = failures[0]
+            raise exc_type, exc_value, exc_tb
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up a file of ISBNs on isbndb.com")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="file with one ISBN per line (default: stdin)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="file to append records to (default: stdout)")
+    parser.add_argument('-f', '--format', choices=('ndjson', 'csv'), default='ndjson',
+                        help="output record format")
+    parser.add_argument('-k', '--access-key', default=None,
+                        help="isbndb.com access key (default: $ISBNDB_ACCESS_KEY)")
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help="number of concurrent lookups")
+    parser.add_argument('-a', '--adaptive', action='store_true',
+                        help="adapt concurrency (up to --workers) to latency and errors")
+    parser.add_argument('-t', '--timeout', type=float, default=None,
+                        help="seconds to wait for each response")
+    parser.add_argument('-r', '--rate', type=float, default=None,
+                        help="maximum number of requests per second")
+    parser.add_argument('-c', '--cache', default=None,
+                        help="shelve file used to cache results between runs")
+    parser.add_argument('--checkpoint', default=None,
+                        help="file of completed ISBNs (default: OUTPUT.checkpoint)")
+    parser.add_argument('--results', default='details',
+                        help="results set to request for each book")
+    parser.add_argument('--retries', type=int, default=2,
+                        help="times to retry network and server errors")
+    parser.add_argument('--retry-errors', action='store_true',
+                        help="look up ISBNs the server rejected in earlier runs again")
+    parser.add_argument('--interval', type=float, default=5.0,
+                        help="seconds between progress reports on stderr")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("there must be at least one worker")
+
+    path = args.checkpoint
+    if path is None and args.output != '-':
+        path = args.output + '.checkpoint'
+
+    # Opened inside the try so that failures are reported and cleaned up
+    checkpoint = output = stream = cache = records = None
+    try:
+        checkpoint = Checkpoint(path) if path else None
+
+        if args.output == '-':
+            output = sys.stdout
+            header = True
+        else:
+            header = not os.path.exists(args.output) or os.path.getsize(args.output) == 0
+            output = open(args.output, 'ab')
+
+        stream = sys.stdin if args.input == '-' else open(args.input)
+        cache  = shelve.open(args.cache) if args.cache else None
+
+        limiter  = None
+        if args.adaptive:
+            limiter = AdaptiveLimiter(initial=min(4, args.workers), maximum=args.workers)
+        client   = ISBNdbClient(access_key=args.access_key, limiter=limiter,
+                                timeout=args.timeout)
+        client.books.set_results(args.results)
+        writer   = Writer(output, args.format, header)
+        progress = Progress(interval=args.interval, limiter=limiter)
+
+        def pending( ):
+            for isbn in read_isbns(stream):
+                if checkpoint is not None and isbn in checkpoint:
+                    if not (args.retry_errors and isbn in checkpoint.failed):
+                        progress.skipped += 1
+                        continue
+                yield isbn
+
+        bulk    = BulkLookup(client, args.workers, args.rate, cache, args.results, args.retries)
+        records = bulk.run(pending( ))
+        for record in records:
+            if is_fatal(record):
+                raise ISBNdbException("stopping, the access key was refused: %s" % record['error'])
+            writer.write(record)
+            writer.flush( )
+            # Transient errors are left out of the checkpoint so they are retried
+            failed = is_permanent(record)
+            if checkpoint is not None and (record['status'] != 'error' or failed):
+                checkpoint.add(record['isbn'], failed)
+                checkpoint.flush( )
+            progress.update(record['status'])
+    except KeyboardInterrupt:
+        sys.stderr.write("interrupted, rerun with the same arguments to resume\n")
+        return 130
+    except (ISBNdbException, IOError, UnicodeError), e:
+        sys.stderr.write("%s\n" % e)
+        return 1
+    finally:
+        if records is not None:
+            records.close( )
+        if checkpoint is not None:
+            checkpoint.close( )
+        if cache is not None:
+            cache.close( )
+        if output is not None and output is not sys.stdout:
+            output.close( )
+        if stream is not None and stream is not sys.stdin:
+            stream.close( )
+
+    progress.report( )
+    return 1 if progress.counts['error'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main( ))
@@ -1,6 +1,5 @@
 from models import *
 from isbndb import ISBNdbException
-from dateutil.parser import parse as isodateparse
 
 class ResultSet(object):
     
@@ -15,25 +14,25 @@ class ResultSet(object):
         return self._cached_length
 
     def __iter__(self):
-        for elem in self.result_list.childNodes:
-            if elem.nodeType == elem.ELEMENT_NODE:
-                yield self.model(elem)
+        return iter(self.models)
 
     def __getitem__(self, index):
         if index < 0:
             raise IndexError("negative indexing not supported on ResultSet")
+        if index >= len(self.models):
+            raise IndexError("list index is out of range (use next to fetch more results)")
+        return self.models[index]
 
-        i = 0
-        for elem in self.result_list.childNodes:
-            if elem.nodeType == elem.ELEMENT_NODE:
-                if i == index:
-                    return self.model(elem)
-                else:
-                    i += 1
-        raise IndexError("list index is out of range (use next to fetch more results)")
+    @property
+    def models(self):
+        if not hasattr(self, '_cached_models'):
+            self._cached_models = tuple(self.model(elem) for elem in self.result_list.childNodes
+                                        if elem.nodeType == elem.ELEMENT_NODE)
+        return self._cached_models
 
     @property
     def last_access(self):
+         from dateutil.parser import parse as isodateparse
          tstr = self.xml.documentElement.getAttribute('server_time')
          return isodateparse(tstr)
 
@@ -64,6 +63,7 @@ class Collection(object):
     model_class  = None
     list_element = None
     result_types = None
+    search_index = None
 
     def __init__(self, client=None, results=None):
         if self.path is None:
@@ -86,7 +86,10 @@ class Collection(object):
         params   = self.get_request_params(results, [(index, value)])
         response = self.request(params=params, **kwargs)
         if self.model_class is not None:
-            return ResultSet(response, self.list_element, self.model_class)
+            resultset = ResultSet(response, self.list_element, self.model_class)
+            if self.search_index is not None and not (kwargs.get('debug') or kwargs.get('stats')):
+                self.search_index.update(resultset)
+            return resultset
         else:
             return response
 
@@ -136,8 +139,31 @@ class BookCollection(Collection):
     list_element = "BookList"
     result_types = ('details', 'texts', 'prices', 'pricehistory', 'subjects', 'authors', 'marc')
 
-    def __init__(self, client=None, results='authors'):
+    def __init__(self, client=None, results='authors', search_index=None):
         super(BookCollection, self).__init__(client, results)
+        self.search_index = search_index
+
+    def search(self, index, term, **kwargs):
+        """
+        Performs a keyword search on the given index. If a search index is set
+        and it knows what the server would return for the search and results
+        set, the answer is given locally, otherwise it comes from the server.
+        Pass local=False to always query the server.
+        """
+        local   = kwargs.pop('local', True)
+        results = kwargs.get('results', self.results)
+
+        # Only plain searches are answered locally, other options go to lookup
+        plain = set(kwargs) <= set(['results'])
+        if local and plain and self.search_index is not None:
+            answer = self.search_index.answer(index, term, results)
+            if answer is not None:
+                return answer
+
+        resultset = self.lookup(index, term, **kwargs)
+        if plain and self.search_index is not None:
+            self.search_index.record(index, term, results, resultset)
+        return resultset
 
     def isbn(self, isbn, **kwargs):
         """
@@ -156,7 +182,7 @@ class BookCollection(Collection):
         itself. You can group words together using double quotes, all non-ignored
         words must be present in the results.
         """
-        return self.lookup('title', title, **kwargs)
+        return self.search('title', title, **kwargs)
 
     def combined(self, term, **kwargs):
         """
@@ -166,14 +192,14 @@ class BookCollection(Collection):
         type when search for a book. Another possibility is a generic title with 
         a publisher to look for series. 
         """
-        return self.lookup('combined', term, **kwargs)
+        return self.search('combined', term, **kwargs)
 
     def full(self, term, **kwargs):
         """
         Search index that includes titles, authors, publisher name, summary, notes
         awards information, etc. 
         """
-        return self.lookup('full', term, **kwargs)
+        return self.search('full', term, **kwargs)
 
     def book_id(self, book_id, **kwargs):
         """
@@ -1,12 +1,11 @@
 #!/usr/bin/env python
 
 import os
-from urllib import urlencode
-from httplib import HTTPConnection
-from xml.dom.minidom import parse
 from isbndb import ISBNdbException
 from isbndb import ISBNdbHttpException
-from isbndb.catalog import *
+
+# The http, xml and catalog modules are imported when first needed so that
+# importing the client stays cheap for short lived processes.
 
 def find_credentials( ):
     """
@@ -20,15 +19,43 @@ def find_credentials( ):
     except KeyError:
         return None
 
+def collection(name, **attrs):
+    """
+    A client property that imports the catalog and creates the named
+    collection when it is first read. Keyword arguments map constructor
+    arguments of the collection to attributes of the client.
+    """
+    cache = '_cached_' + name
+
+    def getter(self):
+        if not hasattr(self, cache):
+            from isbndb import catalog
+            options = dict((key, getattr(self, attr)) for key, attr in attrs.items())
+            setattr(self, cache, getattr(catalog, name)(self, **options))
+        return getattr(self, cache)
+    return property(getter)
+
 class ISBNdbClient(object):
     """
     A client for accessing the ISBNdb API
     """
 
+    # Collections are created (and the catalog imported) on first access
+    books      = collection('BookCollection', search_index='search_index')
+    subjects   = collection('SubjectCollection')
+    categories = collection('CategoryCollection')
+    authors    = collection('AuthorCollection')
+    publishers = collection('PublisherCollection')
+
     def __init__(self, access_key=None, host="isbndb.com", 
-                 base="/api/", client=None):
+                 base="/api/", client=None, search_index=None,
+                 limiter=None, timeout=None):
         """
         Create an ISBNdb API client
+
+        @param: search_index a SearchIndex that answers book keyword searches
+        @param: limiter an AdaptiveLimiter shared by threads using this client
+        @param: timeout seconds to wait on the server before giving up
         """
 
         # Get account credentials (for now, just the access key)
@@ -52,13 +79,9 @@ class ISBNdbClient(object):
         self.host = host
         self.base = base
         self.auth = access_key
-
-        # Add collections
-        self.books      = BookCollection(self)
-        self.subjects   = SubjectCollection(self)
-        self.categories = CategoryCollection(self)
-        self.authors    = AuthorCollection(self)
-        self.publishers = PublisherCollection(self)
+        self.search_index = search_index
+        self.limiter = limiter
+        self.timeout = timeout
 
     def request(self, path, method=None, params=None, debug=False, stats=False):
         """
@@ -69,7 +92,10 @@ class ISBNdbClient(object):
         @param: debug if true, reports the arguments that you sent to the server
         @param: stats if true, reports the statistics of the key in use.
         """
-        
+        from urllib import urlencode
+        from httplib import HTTPConnection
+        from xml.dom.minidom import parse
+
         params = params or { }
         params['access_key'] = self.auth
         if debug:
@@ -99,19 +125,31 @@ class ISBNdbClient(object):
             "User-Agent":"ISBNdb-Python",
         }
 
-        conn = HTTPConnection(self.host)
-
-        if query:
-            conn.request(method, '?'.join([uri, query]), '', headers)
-        elif data:
-            conn.request(method, uri, data, headers)
-
-        response = conn.getresponse( )
-
-        if response.status != 200:
-            raise ISBNdbHttpException(response.status, uri, response.reason)
+        if self.timeout is not None:
+            conn = HTTPConnection(self.host, timeout=self.timeout)
         else:
-            return parse(response)
+            conn = HTTPConnection(self.host)
+
+        # Errors and timeouts count as failures against the adaptive limiter
+        started = self.limiter.acquire( ) if self.limiter is not None else None
+        failed  = True
+        try:
+            if query:
+                conn.request(method, '?'.join([uri, query]), '', headers)
+            elif data:
+                conn.request(method, uri, data, headers)
+
+            response = conn.getresponse( )
+
+            if response.status != 200:
+                raise ISBNdbHttpException(response.status, uri, response.reason)
+
+            result = parse(response)
+            failed = False
+            return result
+        finally:
+            if started is not None:
+                self.limiter.release(started, failed)
 
     def keystats(self):
         """
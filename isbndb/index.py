@@ -0,0 +1,323 @@
+import re
+import bisect
+import threading
+import unicodedata
+
+from collections import OrderedDict
+
+# Fields of the Book model searched by each of the keyword indexes on isbndb.com
+FIELDS = {
+    'title':    ('title', 'title_long'),
+    'combined': ('title', 'title_long', 'authors_text', 'publisher_text'),
+    'full':     ('title', 'title_long', 'authors_text', 'publisher_text', 'summary'),
+}
+
+# Indexes whose fields are returned in every results set. The full index also
+# searches notes, awards and other text that most results sets leave out, so
+# a narrower full search can't be answered from the books of a broader one.
+NARROWABLE = ('title', 'combined')
+
+# Words that are ignored by keyword searches unless quoted in a phrase
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'the', 'to', 'with',
+))
+
+WORD   = re.compile(r'\w+', re.UNICODE)
+PHRASE = re.compile(r'"([^"]*)"?|([^"\s]+)', re.UNICODE)
+
+def tokenize(text):
+    """
+    Splits text into lowercase words with accents removed, so that unicode
+    titles also match their latinized spelling.
+    """
+    if not text:
+        return []
+    if isinstance(text, str):
+        text = text.decode('utf-8', 'ignore')
+    text = unicodedata.normalize('NFKD', text)
+    text = u''.join(c for c in text if not unicodedata.combining(c))
+    return WORD.findall(text.lower())
+
+def parse_query(query):
+    """
+    Parses a keyword query into a list of terms, each a tuple of words. Words
+    grouped in double quotes form a single phrase term.
+    """
+    terms = []
+    for phrase, word in PHRASE.findall(query):
+        if phrase:
+            words = tokenize(phrase)
+            if words:
+                terms.append(tuple(words))
+        else:
+            terms.extend((w,) for w in tokenize(word) if w not in STOPWORDS)
+    return terms
+
+def contains(words, phrase):
+    """
+    True if the phrase appears as a contiguous run in the list of words.
+    """
+    size = len(phrase)
+    for i in xrange(len(words) - size + 1):
+        if tuple(words[i:i+size]) == phrase:
+            return True
+    return False
+
+class LocalResultSet(object):
+    """
+    The books of a complete ResultSet (every match shown on its first page)
+    that also match a narrower query. The server would return exactly these
+    books for the narrower query, so the members mean what they do on a
+    ResultSet.
+    """
+
+    current_page = 1
+
+    def __init__(self, source, books):
+        self.source = source
+        self.books  = tuple(books)
+
+    def __len__(self):
+        return len(self.books)
+
+    def __iter__(self):
+        return iter(self.books)
+
+    def __getitem__(self, index):
+        if index < 0:
+            raise IndexError("negative indexing not supported on ResultSet")
+        if index >= len(self.books):
+            raise IndexError("list index is out of range (use next to fetch more results)")
+        return self.books[index]
+
+    @property
+    def last_access(self):
+        return self.source.last_access
+
+    @property
+    def page_size(self):
+        return self.source.page_size
+
+    @property
+    def shown_results(self):
+        return len(self.books)
+
+class SearchIndex(object):
+    """
+    An in memory inverted index of Books that have been fetched from the API,
+    answering keyword and prefix (autocomplete) queries locally. It also keeps
+    the server's responses to keyword searches so that repeated and narrower
+    searches can be answered without a request.
+
+    At most max_queries responses are kept, the least recently used are
+    dropped first. Indexed books are kept until they are removed or the index
+    is cleared; each holds on to the XML document it was parsed from.
+    """
+
+    def __init__(self, max_queries=1000):
+        self.lock      = threading.RLock()
+        self.max_queries = max_queries
+        self.queries   = OrderedDict()
+        self.documents = {}
+        self.order     = {}
+        self.words     = {}
+        self.postings  = {}
+        self.counter   = 0
+        self._vocabulary = None
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __contains__(self, book_id):
+        return book_id in self.documents
+
+    @property
+    def vocabulary(self):
+        """
+        A sorted list of every indexed word, rebuilt after the index changes.
+        """
+        with self.lock:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self.postings)
+            return self._vocabulary
+
+    def add(self, book):
+        """
+        Adds (or replaces) a book in the index. Fields missing from the new
+        record, e.g. because another results set was requested, are kept.
+        """
+        key = book.book_id or book.isbn
+        if key is None:
+            return
+
+        words = {}
+        for field in FIELDS['full']:
+            words[field] = tokenize(getattr(book, field, None))
+
+        with self.lock:
+            previous = self.words.get(key, {})
+            for field, tokens in previous.items():
+                if not words[field]:
+                    words[field] = tokens
+            self.remove(key)
+
+            self.counter += 1
+            self.order[key]     = self.counter
+            self.documents[key] = book
+            self.words[key]     = words
+            for field, tokens in words.items():
+                for token in tokens:
+                    self.postings.setdefault(token, {}).setdefault(field, set()).add(key)
+            self._vocabulary = None
+
+    def update(self, books):
+        for book in books:
+            self.add(book)
+
+    def clear(self):
+        """
+        Removes every indexed book and recorded search.
+        """
+        with self.lock:
+            self.queries.clear()
+            self.documents.clear()
+            self.order.clear()
+            self.words.clear()
+            self.postings.clear()
+            self._vocabulary = None
+
+    def remove(self, key):
+        with self.lock:
+            if key not in self.documents:
+                return
+            for field, tokens in self.words.pop(key).items():
+                for token in tokens:
+                    fields = self.postings.get(token, {})
+                    fields.get(field, set()).discard(key)
+                    if field in fields and not fields[field]:
+                        del fields[field]
+                    if not fields:
+                        self.postings.pop(token, None)
+            del self.documents[key]
+            del self.order[key]
+            self._vocabulary = None
+
+    def _lookup(self, token, fields):
+        postings = self.postings.get(token, {})
+        keys = set()
+        for field in fields:
+            keys.update(postings.get(field, ()))
+        return keys
+
+    def _match(self, terms, fields, keys=None):
+        """
+        Returns the keys of documents that contain every term in one of the
+        fields, or None when no term constrains the search.
+        """
+        tokens = [word for term in terms for word in term if word not in STOPWORDS]
+
+        # Intersect the most selective words first
+        for found in sorted((self._lookup(token, fields) for token in set(tokens)), key=len):
+            keys = found if keys is None else keys & found
+            if not keys:
+                return keys
+
+        if keys is None:
+            return keys
+        for phrase in (term for term in terms if len(term) > 1):
+            keys = set(key for key in keys if any(contains(self.words[key][field], phrase)
+                                                  for field in fields))
+        return keys
+
+    def _results(self, keys, limit=None):
+        keys = sorted(keys, key=self.order.get)
+        if limit is not None:
+            keys = keys[:limit]
+        return [self.documents[key] for key in keys]
+
+    def record(self, index, query, results, resultset):
+        """
+        Keeps the server's first page of results for a keyword search on the
+        given index ('title', 'combined' or 'full') and results set.
+        """
+        terms = frozenset(parse_query(query))
+        if terms and resultset.current_page == 1:
+            with self.lock:
+                key = (index, results, terms)
+                self.queries.pop(key, None)
+                self.queries[key] = resultset
+                while len(self.queries) > self.max_queries:
+                    self.queries.popitem(last=False)
+
+    def answer(self, index, query, results):
+        """
+        Returns what the server would for a keyword search, or None if that
+        is not known locally. A search seen before with the same results set
+        returns the recorded ResultSet. A narrower title or combined search
+        (one that adds words to a recorded search whose matches all fit on one
+        page) returns the recorded books it matches as a LocalResultSet.
+        """
+        terms = frozenset(parse_query(query))
+        if not terms:
+            return None
+
+        with self.lock:
+            key = (index, results, terms)
+            if key in self.queries:
+                # Mark the search as the most recently used
+                resultset = self.queries[key] = self.queries.pop(key)
+                return resultset
+            if index not in NARROWABLE:
+                return None
+
+            sources = [rs for (i, r, known), rs in self.queries.items()
+                       if (i, r) == (index, results) and known < terms
+                       and len(rs) == rs.shown_results]
+            if not sources:
+                return None
+
+            source = min(sources, key=len)
+            books  = [book for book in source if (book.book_id or book.isbn) in self.documents]
+            keys   = self._match(list(terms), FIELDS[index],
+                                 set(book.book_id or book.isbn for book in books))
+            return LocalResultSet(source, (book for book in books
+                                           if (book.book_id or book.isbn) in keys))
+
+    def search(self, query, index='title'):
+        """
+        Returns every indexed book whose fields for the given keyword index
+        ('title', 'combined' or 'full') contain every non-ignored word of the
+        query, whichever request it was fetched by.
+        """
+        fields = FIELDS[index]
+        with self.lock:
+            keys = self._match(parse_query(query), fields)
+            return self._results(keys or ())
+
+    def complete(self, prefix, index='title', limit=10):
+        """
+        Returns up to limit books for a partially typed query: the last word
+        is matched as a prefix, every preceding word must match in full.
+        """
+        fields = FIELDS[index]
+        words  = tokenize(prefix)
+        if not words:
+            return []
+
+        if prefix[-1].isspace():
+            terms, last = [(word,) for word in words], None
+        else:
+            terms, last = [(word,) for word in words[:-1]], words[-1]
+
+        with self.lock:
+            keys = None
+            if last is not None:
+                vocabulary = self.vocabulary
+                keys = set()
+                for i in xrange(bisect.bisect_left(vocabulary, last), len(vocabulary)):
+                    if not vocabulary[i].startswith(last):
+                        break
+                    keys.update(self._lookup(vocabulary[i], fields))
+            keys = self._match(terms, fields, keys)
+            return self._results(keys or (), limit)
@@ -1,8 +1,66 @@
+from collections import Mapping
+
+def cached(func):
+    """
+    A read only property that is computed once per record and then reused.
+    """
+    name = '_cached_' + func.__name__
+
+    def getter(self):
+        if not hasattr(self, name):
+            setattr(self, name, func(self))
+        return getattr(self, name)
+    return property(getter, doc=func.__doc__)
+
+class AttributeView(Mapping):
+    """
+    A read only mapping of the attributes of an XML element, values are read
+    from the element on access rather than copied into a new dictionary.
+    """
+
+    def __init__(self, node):
+        self.attributes = node.attributes
+
+    def __getitem__(self, key):
+        attr = self.attributes.get(key)
+        if attr is None:
+            raise KeyError(key)
+        return attr.value
+
+    def __iter__(self):
+        return iter(self.attributes.keys())
+
+    def __len__(self):
+        return self.attributes.length
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+class Record(Mapping):
+    """
+    A small read only mapping of the values parsed from a child element.
+    """
+
+    def __init__(self, **values):
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return repr(self._values)
 
 class Model(object):
     
     def __init__(self, xml):
         self.raw_data = xml
+        self._elements = {}
 
     def __str__(self):
         return self.raw_data.toprettyxml( )
@@ -14,19 +72,39 @@ class Model(object):
         return val
 
     def _get_element(self, name):
+        if name in self._elements:
+            return self._elements[name]
+
         nodes = self.raw_data.getElementsByTagName(name)
         if len(nodes) == 0:
-            return None
-        if len(nodes) > 1:
+            node = None
+        elif len(nodes) > 1:
             raise AttributeError("Too many elements with name %s" % name)
+        else:
+            node = nodes[0]
 
-        return nodes[0]
+        self._elements[name] = node
+        return node
 
     def _get_childNodes(self, name):
-        return self._get_element(name).childNodes if self._get_element(name) else []
+        element = self._get_element(name)
+        return element.childNodes if element is not None else []
+
+    def _get_childElements(self, name):
+        return tuple(node for node in self._get_childNodes(name)
+                     if node.nodeType == node.ELEMENT_NODE)
+
+    def _get_attributeViews(self, name):
+        return tuple(AttributeView(node) for node in self._get_childElements(name))
+
+    def _get_details(self):
+        delem = self._get_element('Details')
+        if delem is not None:
+            return AttributeView(delem)
+        return None
 
     def _get_nodeValue(self, node):
-        if isinstance(node, str):
+        if isinstance(node, basestring):
             nodes = self._get_childNodes(node)
         elif hasattr(node, 'childNodes'):
             nodes = node.childNodes
@@ -36,7 +114,7 @@ class Model(object):
         if len(nodes) == 0:
             return None
         if len(nodes) > 1:
-            raise AttributeError("Unable to parse value from node with name %s" % name)
+            raise AttributeError("Unable to parse value from node %s" % node)
         
         return nodes[0].nodeValue
 
@@ -66,16 +144,12 @@ class Book(Model):
     def authors_text(self):
         return self._get_nodeValue('AuthorsText')
 
-    @property
+    @cached
     def authors(self):
-        for node in self._get_childNodes('Authors'):
-            if node.nodeType == node.ELEMENT_NODE:
-                aid  = node.getAttribute('person_id')
-                name = self._get_nodeValue(node)
-                yield {
-                    'person_id':   aid,
-                    'person_text': name,
-                }
+        return tuple(Record(
+            person_id=node.getAttribute('person_id'),
+            person_text=self._get_nodeValue(node),
+        ) for node in self._get_childElements('Authors'))
 
     @property
     def publisher_id(self):
@@ -90,12 +164,9 @@ class Book(Model):
     def publisher_text(self):
         return self._get_nodeValue('PublisherText')
 
-    @property
+    @cached
     def details(self):
-        delem = self._get_element('Details')
-        if delem is not None:
-            return dict(delem.attributes.items())
-        return None
+        return self._get_details( )
 
     @property
     def summary(self):
@@ -113,28 +184,20 @@ class Book(Model):
     def awards_text(self):
         return self._get_nodeValue('AwardsText')
 
-    @property
+    @cached
     def prices(self):
-        for node in self._get_childNodes('Prices'):
-            if node.nodeType == node.ELEMENT_NODE:
-                yield dict(node.attributes.items())
+        return self._get_attributeViews('Prices')
 
-    @property 
+    @cached
     def subjects(self):
-        for node in self._get_childNodes('Subjects'):
-            if node.nodeType == node.ELEMENT_NODE:
-                sid  = node.getAttribute('subject_id')
-                text = self._get_nodeValue(node)
-                yield {
-                    'subject_id':   sid,
-                    'subject_text': text,
-                }
+        return tuple(Record(
+            subject_id=node.getAttribute('subject_id'),
+            subject_text=self._get_nodeValue(node),
+        ) for node in self._get_childElements('Subjects'))
 
-    @property
+    @cached
     def marc_records(self):
-        for node in self._get_childNodes('MARCRecords'):
-            if node.nodeType == node.ELEMENT_NODE:
-                yield dict(node.attributes.items())
+        return self._get_attributeViews('MARCRecords')
 
 class Subject(Model):
 
@@ -159,22 +222,16 @@ class Subject(Model):
     def name(self):
         return self._get_nodeValue('Name')
 
-    @property 
+    @cached
     def categories(self):
-        for node in self._get_childNodes('Categories'):
-            if node.nodeType == node.ELEMENT_NODE:
-                cid  = node.getAttribute('category_id')
-                text = self._get_nodeValue(node)
-                yield {
-                    'category_id':   cid,
-                    'category_text': text,
-                }
+        return tuple(Record(
+            category_id=node.getAttribute('category_id'),
+            category_text=self._get_nodeValue(node),
+        ) for node in self._get_childElements('Categories'))
 
-    @property
+    @cached
     def structure(self):
-        for node in self._get_childNodes('SubjectStructure'):
-            if node.nodeType == node.ELEMENT_NODE:
-                yield dict(node.attributes.items())
+        return self._get_attributeViews('SubjectStructure')
 
 class Category(Model):
     
@@ -190,18 +247,13 @@ class Category(Model):
     def name(self):
         return self._get_nodeValue('Name')
 
-    @property
+    @cached
     def details(self):
-        delem = self._get_element('Details')
-        if delem:
-            return dict(delem.attributes.items())
-        return {}
+        return self._get_details( ) or {}
 
-    @property
+    @cached
     def subcategories(self):
-        for node in self._get_childNodes('SubCategories'):
-            if node.nodeType == node.ELEMENT_NODE:
-                yield dict(node.attributes.items())
+        return self._get_attributeViews('SubCategories')
 
 class Author(Model):
 
@@ -213,36 +265,24 @@ class Author(Model):
     def name(self):
         return self._get_nodeValue('Name')
 
-    @property 
+    @cached
     def details(self):
-        delem = self._get_element('Details')
-        if delem:
-            return dict(delem.attributes.items())
-        return None
+        return self._get_details( )
 
-    @property 
+    @cached
     def categories(self):
-        for node in self._get_childNodes('Categories'):
-            if node.nodeType == node.ELEMENT_NODE:
-                cid  = node.getAttribute('category_id')
-                text = self._get_nodeValue(node)
-                yield {
-                    'category_id':   cid,
-                    'category_text': text,
-                }
+        return tuple(Record(
+            category_id=node.getAttribute('category_id'),
+            category_text=self._get_nodeValue(node),
+        ) for node in self._get_childElements('Categories'))
 
-    @property
+    @cached
     def subjects(self):
-        for node in self._get_childNodes('Subjects'):
-            if node.nodeType == node.ELEMENT_NODE:
-                sid   = node.getAttribute('subject_id')
-                count = node.getAttribute('book_count')
-                text  = self._get_nodeValue(node)
-                yield {
-                    'subject_id':   sid,
-                    'book_count':   count,
-                    'subject_text': text,
-                }
+        return tuple(Record(
+            subject_id=node.getAttribute('subject_id'),
+            book_count=node.getAttribute('book_count'),
+            subject_text=self._get_nodeValue(node),
+        ) for node in self._get_childElements('Subjects'))
 
 class Publisher(Model):
 
@@ -254,20 +294,13 @@ class Publisher(Model):
     def name(self):
         return self._get_nodeValue('Name')
 
-    @property
+    @cached
     def details(self):
-        delem = self._get_element('Details')
-        if delem:
-            return dict(delem.attributes.items())
-        return None
+        return self._get_details( )
 
-    @property
+    @cached
     def categories(self):
-        for node in self._get_childNodes('Categories'):
-            if node.nodeType == node.ELEMENT_NODE:
-                cid  = node.getAttribute('category_id')
-                text = self._get_nodeValue(node)
-                yield {
-                    'category_id':   cid,
-                    'category_text': text,
-                }
+        return tuple(Record(
+            category_id=node.getAttribute('category_id'),
+            category_text=self._get_nodeValue(node),
+        ) for node in self._get_childElements('Categories'))
@@ -0,0 +1,129 @@
+import time
+import threading
+
+class RateLimiter(object):
+    """
+    A thread safe token bucket that limits the number of requests made per
+    second against the ISBNdb API (which meters each access key daily).
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Allow an average of rate requests per second, with at most burst
+        requests made back to back (defaults to one second's worth).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be a positive number of requests per second")
+
+        self.rate   = float(rate)
+        self.burst  = float(burst or max(1, rate))
+        self.tokens = self.burst
+        self.stamp  = time.time()
+        self.lock   = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a request may be made, then consumes a token.
+        """
+        while True:
+            with self.lock:
+                now = time.time()
+                self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp  = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class AdaptiveLimiter(object):
+    """
+    Limits the number of requests in flight, adapting the limit to the
+    latency and errors observed (additive increase, multiplicative decrease).
+
+    The limit grows by about one request per round trip while the smoothed
+    round trip time stays within tolerance of the fastest seen, and is cut by
+    the backoff factor when latency rises or a request fails.
+
+    Threads call acquire, which blocks until a slot is free. Callers that
+    must not block (e.g. an event loop) call try_acquire and retry later if
+    it returns None. Either way the returned stamp is passed to release when
+    the request completes.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, backoff=0.5,
+                 tolerance=2.0, smoothing=0.2):
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError("limits must satisfy 1 <= minimum <= initial <= maximum")
+
+        self.window    = float(initial)
+        self.minimum   = minimum
+        self.maximum   = maximum
+        self.backoff   = backoff
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.inflight  = 0
+        self.rtt       = None
+        self.min_rtt   = None
+        self.decreased = 0.0
+        self.cond      = threading.Condition()
+
+    @property
+    def limit(self):
+        return int(self.window)
+
+    def try_acquire(self):
+        """
+        Takes a slot if one is free and returns its start stamp, else None.
+        """
+        with self.cond:
+            if self.inflight < self.limit:
+                self.inflight += 1
+                return time.time()
+            return None
+
+    def acquire(self, timeout=None):
+        """
+        Blocks until a slot is free and returns its start stamp, or None if
+        the timeout (in seconds) expires first.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self.cond:
+            while self.inflight >= self.limit:
+                if deadline is None:
+                    self.cond.wait( )
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return None
+                    self.cond.wait(remaining)
+            self.inflight += 1
+            return time.time()
+
+    def release(self, started, failed=False):
+        """
+        Frees the slot taken at started and adjusts the limit. Failed requests
+        (errors, throttling, timeouts) always reduce the limit.
+        """
+        now = time.time()
+        rtt = now - started
+        with self.cond:
+            self.inflight -= 1
+            if not failed:
+                if self.rtt is None:
+                    self.rtt = self.min_rtt = rtt
+                else:
+                    self.rtt = (1 - self.smoothing) * self.rtt + self.smoothing * rtt
+                    # Let the baseline creep up so a lasting change in latency
+                    # does not pin the limit at its minimum
+                    self.min_rtt = min(rtt, self.min_rtt * 1.01)
+
+            if failed or self.rtt > self.tolerance * max(self.min_rtt, 0.001):
+                # Back off once per round trip, not once per request that was
+                # already in flight when the trouble started
+                if started >= self.decreased:
+                    self.window    = max(self.minimum, self.window * self.backoff)
+                    self.decreased = now
+            else:
+                self.window = min(self.maximum, self.window + 1.0 / self.window)
+            self.cond.notify_all( )
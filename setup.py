@@ -13,7 +13,7 @@ config = {
     'version': '1.0.0',
     'install_requires': ['nose','python-dateutil',],
     'packages': ['isbndb',],
-    'scripts': [],
+    'scripts': ['bin/isbndb-bulk',],
     'name': 'isbndb-python',
 }
 
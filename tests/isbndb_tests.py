@@ -5,6 +5,7 @@ from isbndb.models  import *
 from isbndb.client  import ISBNdbClient
 from isbndb.catalog import *
 from unittest import TestCase
+from StringIO import StringIO
 
 ACCESS_KEY = "UQ8OR4XB"
 
@@ -20,6 +21,269 @@ class ISBNdbTest(TestCase):
         catalog = BookCollection(self.client)
         result  = catalog.isbn('0210406240', results='authors')
 
+class ImportTest(TestCase):
+
+    SCRIPT = """
+import sys
+before = set(sys.modules)
+import isbndb.client
+heavy  = ('dateutil', 'isbndb.catalog', 'httplib', 'ssl', 'xml.dom.minidom')
+print len(set(sys.modules) - before)
+print ' '.join(name for name in heavy if name in sys.modules)
+"""
+
+    def test_import_footprint(self):
+        """
+        Importing the client should not load http, xml, dateutil or the catalog
+        """
+        import os
+        import sys
+        from subprocess import Popen, PIPE
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        proc = Popen([sys.executable, '-c', self.SCRIPT], stdout=PIPE, cwd=root)
+        loaded, heavy = proc.communicate()[0].split('\n')[:2]
+        self.assertEqual(heavy, '')
+        self.assertTrue(int(loaded) <= 10, "importing isbndb.client loaded %s modules" % loaded)
+
+    def test_lazy_collections(self):
+        from isbndb.client import ISBNdbClient
+        from isbndb.index import SearchIndex
+        client = ISBNdbClient(access_key=ACCESS_KEY, search_index=SearchIndex())
+        self.assertTrue(isinstance(client.books, BookCollection))
+        self.assertTrue(client.books is client.books)
+        self.assertTrue(client.books.search_index is client.search_index)
+        self.assertTrue(isinstance(client.publishers, PublisherCollection))
+
+class BulkTest(TestCase):
+
+    def test_read_isbns(self):
+        from isbndb.bulk import read_isbns
+        stream = StringIO("0-210-40624-0\n\n# comment\n 978 0061041327 \n")
+        self.assertEqual(list(read_isbns(stream)), ['0210406240', '9780061041327'])
+
+    def test_csv_writer(self):
+        from isbndb.bulk import Writer
+        stream = StringIO()
+        writer = Writer(stream, 'csv')
+        writer.write({'isbn': '0210406240', 'status': 'ok', 'title': u'Caf\xe9'})
+        lines  = stream.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('isbn,status,'))
+        self.assertTrue(lines[1].startswith('0210406240,ok,'))
+
+    def test_input_error(self):
+        from isbndb.bulk import BulkLookup
+
+        class Client(object):
+            class books(object):
+                @staticmethod
+                def isbn(isbn, results=None):
+                    return []
+
+        def isbns( ):
+            yield '0210406240'
+            raise IOError("unreadable input")
+
+        records = []
+        bulk    = BulkLookup(Client(), workers=2)
+        with self.assertRaises(IOError):
+            for record in bulk.run(isbns( )):
+                records.append(record)
+        self.assertEqual(records, [{'isbn': '0210406240', 'status': 'missing'}])
+
+    def test_missing_input(self):
+        import os
+        import sys
+        import tempfile
+        from isbndb.bulk import main
+        root   = tempfile.mkdtemp()
+        output = os.path.join(root, 'out.csv')
+        stderr, sys.stderr = sys.stderr, StringIO()
+        try:
+            status = main([os.path.join(root, 'missing.txt'), '-o', output, '-k', ACCESS_KEY])
+            self.assertEqual(status, 1)
+            self.assertTrue('missing.txt' in sys.stderr.getvalue())
+        finally:
+            sys.stderr = stderr
+            for name in os.listdir(root):
+                os.remove(os.path.join(root, name))
+            os.rmdir(root)
+
+    def test_checkpoint(self):
+        import os
+        import tempfile
+        from isbndb.bulk import Checkpoint, is_permanent, is_fatal, is_retryable
+        error = lambda status: {'isbn': 'BAD', 'status': 'error', 'http_status': status}
+        for status in (400, 404):
+            self.assertTrue(is_permanent(error(status)))
+            self.assertFalse(is_retryable(status) or is_fatal(error(status)))
+        for status in (None, 408, 429, 500, 503):
+            self.assertTrue(is_retryable(status))
+            self.assertFalse(is_permanent(error(status)) or is_fatal(error(status)))
+        for status in (401, 403):
+            self.assertTrue(is_fatal(error(status)))
+            self.assertFalse(is_retryable(status) or is_permanent(error(status)))
+
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            checkpoint = Checkpoint(path)
+            checkpoint.add('0210406240')
+            checkpoint.add('BAD', failed=True)
+            checkpoint.close()
+
+            checkpoint = Checkpoint(path)
+            checkpoint.close()
+            self.assertTrue('0210406240' in checkpoint and 'BAD' in checkpoint)
+            self.assertEqual(checkpoint.failed, set(['BAD']))
+        finally:
+            os.remove(path)
+
+class AdaptiveLimiterTest(TestCase):
+
+    def test_limit(self):
+        from isbndb.throttle import AdaptiveLimiter
+        limiter = AdaptiveLimiter(initial=2, maximum=4)
+        started = [limiter.try_acquire(), limiter.try_acquire()]
+        self.assertTrue(None not in started)
+        self.assertEqual(limiter.try_acquire(), None)
+        self.assertEqual(limiter.acquire(timeout=0.01), None)
+        for stamp in started:
+            limiter.release(stamp - 0.1)
+
+        # Steady latency grows the limit, a failure halves it
+        for i in xrange(10):
+            limiter.release(limiter.acquire() - 0.1)
+        self.assertEqual(limiter.limit, 4)
+        self.assertAlmostEqual(limiter.rtt, 0.1, places=2)
+        limiter.release(limiter.acquire(), failed=True)
+        self.assertEqual(limiter.limit, 2)
+
+        # Requests already in flight when it backed off do not cut it again
+        limiter.release(limiter.acquire() - 1.0, failed=True)
+        self.assertEqual(limiter.limit, 2)
+
+        # Rising latency backs off too
+        limiter = AdaptiveLimiter(initial=4)
+        limiter.release(limiter.acquire() - 0.1)
+        limiter.release(limiter.acquire() - 1.0)
+        self.assertEqual(limiter.limit, 2)
+
+class ModelTest(TestCase):
+
+    BOOK = """<BookData book_id="lord_of_the_flies" isbn="0399501487">
+      <Title>Lord of the Flies</Title>
+      <Details dewey_decimal="823.914" physical_description_text="208 pages" />
+      <Authors><Person person_id="golding_william">William Golding</Person></Authors>
+      <Prices><Price store_id="amazon" price="10.88" /><Price store_id="bn" price="11.20" /></Prices>
+    </BookData>"""
+
+    def setUp(self):
+        from xml.dom.minidom import parseString
+        self.book = Book(parseString(self.BOOK).documentElement)
+
+    def test_details(self):
+        details = self.book.details
+        self.assertEqual(details, {'dewey_decimal': '823.914', 'physical_description_text': '208 pages'})
+        self.assertEqual(details['dewey_decimal'], '823.914')
+        self.assertRaises(KeyError, lambda: details['isbn'])
+        self.assertTrue(self.book.details is details)
+
+    def test_cached_lists(self):
+        self.assertEqual(self.book.authors, ({'person_id': 'golding_william', 'person_text': 'William Golding'},))
+        self.assertEqual([price['price'] for price in self.book.prices], ['10.88', '11.20'])
+        self.assertTrue(self.book.prices is self.book.prices)
+        self.assertEqual(self.book.marc_records, ())
+
+    def test_read_only(self):
+        def assign(mapping, key):
+            mapping[key] = 'MUT'
+        self.assertRaises(TypeError, assign, self.book.authors[0], 'person_id')
+        self.assertRaises(TypeError, assign, self.book.details, 'dewey_decimal')
+        self.assertEqual(self.book.authors[0]['person_id'], 'golding_william')
+
+class SearchIndexTest(TestCase):
+
+    BOOKS = """<BookList>
+      <BookData book_id="lord_of_the_flies" isbn="0399501487">
+        <Title>Lord of the Flies</Title>
+        <AuthorsText>William Golding</AuthorsText>
+        <PublisherText publisher_id="perigee">Perigee Trade</PublisherText>
+      </BookData>
+      <BookData book_id="lord_of_the_rings" isbn="0618640150">
+        <Title>The Lord of the Rings</Title>
+        <AuthorsText>J.R.R. Tolkien</AuthorsText>
+        <PublisherText publisher_id="houghton">Houghton Mifflin</PublisherText>
+      </BookData>
+    </BookList>"""
+
+    def setUp(self):
+        from xml.dom.minidom import parseString
+        from isbndb.index import SearchIndex
+        xml = parseString(self.BOOKS)
+        self.index = SearchIndex()
+        self.index.update(Book(node) for node in xml.getElementsByTagName('BookData'))
+
+    def test_search(self):
+        ids = lambda books: [book.book_id for book in books]
+        self.assertEqual(ids(self.index.search('lord of the')), ['lord_of_the_flies', 'lord_of_the_rings'])
+        self.assertEqual(ids(self.index.search('rings LORD')), ['lord_of_the_rings'])
+        self.assertEqual(ids(self.index.search('"flies lord"')), [])
+        self.assertEqual(ids(self.index.search('golding flies')), [])
+        self.assertEqual(ids(self.index.search('golding flies', 'combined')), ['lord_of_the_flies'])
+
+    def test_answer(self):
+        from xml.dom.minidom import parseString
+        ids = lambda books: [book.book_id for book in books]
+        complete = parseString(self.BOOKS.replace('<BookList>', '<ISBNdb><BookList total_results="2" '
+                               'page_size="10" page_number="1" shown_results="2">')
+                               .replace('</BookList>', '</BookList></ISBNdb>'))
+        resultset = ResultSet(complete, 'BookList', Book)
+        self.index.update(resultset)
+        self.index.record('title', 'lord', 'authors', resultset)
+
+        self.assertTrue(self.index.answer('title', 'LORD', 'authors') is resultset)
+        self.assertEqual(self.index.answer('title', 'lord', 'prices'), None)
+        self.assertEqual(self.index.answer('title', 'rings', 'authors'), None)
+        answer = self.index.answer('title', 'lord rings', 'authors')
+        self.assertEqual((len(answer), answer.page_size, ids(answer)), (1, 10, ['lord_of_the_rings']))
+
+        # A narrower search can only be answered from a complete result set
+        partial = ResultSet(parseString(complete.toxml().replace('total_results="2"', 'total_results="500"')),
+                            'BookList', Book)
+        self.index.record('title', 'lord', 'authors', partial)
+        self.assertEqual(self.index.answer('title', 'lord rings', 'authors'), None)
+        self.assertEqual(len(self.index.answer('title', 'lord', 'authors')), 500)
+
+        # The full index searches fields (notes, awards) that are not indexed
+        self.index.record('full', 'lord', 'authors', resultset)
+        self.assertTrue(self.index.answer('full', 'lord', 'authors') is resultset)
+        self.assertEqual(self.index.answer('full', 'lord hugo', 'authors'), None)
+
+    def test_limits(self):
+        from xml.dom.minidom import parseString
+        from isbndb.index import SearchIndex
+        xml = parseString(self.BOOKS.replace('<BookList>', '<ISBNdb><BookList total_results="2" '
+                          'page_size="10" page_number="1" shown_results="2">')
+                          .replace('</BookList>', '</BookList></ISBNdb>'))
+        resultset = ResultSet(xml, 'BookList', Book)
+        index = SearchIndex(max_queries=2)
+        index.update(resultset)
+        for query in ('lord', 'flies', 'rings'):
+            index.record('title', query, 'authors', resultset)
+            index.answer('title', 'lord', 'authors')
+        self.assertEqual(len(index.queries), 2)
+        self.assertTrue(index.answer('title', 'lord', 'authors') is resultset)
+        self.assertEqual(index.answer('title', 'flies', 'authors'), None)
+
+        index.clear()
+        self.assertEqual((len(index), len(index.queries), index.vocabulary), (0, 0, []))
+        self.assertEqual(index.answer('title', 'lord', 'authors'), None)
+
+    def test_complete(self):
+        ids = lambda books: [book.book_id for book in books]
+        self.assertEqual(ids(self.index.complete('lord of the fl')), ['lord_of_the_flies'])
+        self.assertEqual(ids(self.index.complete('lo', limit=1)), ['lord_of_the_flies'])
+        self.assertEqual(ids(self.index.complete('tolk', 'combined')), ['lord_of_the_rings'])
 
 if __name__ == "__main__":
 